@@ -0,0 +1,107 @@
+# bench/bench_id_interner.py
+"""
+Benchmark de IdInterner: memoria de las columnas de ids y tiempo del join
+pedidos ⋈ items ⋈ clusters (con nunique por cluster) sobre ids hexadecimales
+de 32 caracteres frente a códigos int32.
+
+Uso, desde backend/:
+    python bench/bench_id_interner.py --customers 100000
+"""
+import argparse
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from etl.processing.id_interner import IdInterner  # noqa: E402
+
+
+def hex_ids(rng, n):
+    return [uuid.UUID(int=int(x)).hex for x in rng.integers(0, 2 ** 63, n)]
+
+
+def synthetic_datasets(n_customers, seed=0):
+    """Datasets con la forma de Olist: ~1 pedido por cliente y ~1,15 items por pedido."""
+    rng = np.random.default_rng(seed)
+    n_orders, n_products, n_sellers = n_customers, max(n_customers // 3, 1), max(n_customers // 30, 1)
+    n_items = int(n_orders * 1.15)
+
+    customers = pd.DataFrame({"customer_id": hex_ids(rng, n_customers)})
+    products = pd.DataFrame({"product_id": hex_ids(rng, n_products)})
+    sellers = pd.DataFrame({"seller_id": hex_ids(rng, n_sellers)})
+    orders = pd.DataFrame({
+        "order_id": hex_ids(rng, n_orders),
+        "customer_id": customers["customer_id"].to_numpy()[rng.integers(0, n_customers, n_orders)]
+    })
+    order_items = pd.DataFrame({
+        "order_id": orders["order_id"].to_numpy()[rng.integers(0, n_orders, n_items)],
+        "product_id": products["product_id"].to_numpy()[rng.integers(0, n_products, n_items)],
+        "seller_id": sellers["seller_id"].to_numpy()[rng.integers(0, n_sellers, n_items)]
+    })
+    clusters = customers.assign(cluster=rng.integers(0, 60, n_customers))
+    return {
+        "customers": customers,
+        "products": products,
+        "sellers": sellers,
+        "orders": orders,
+        "order_items": order_items,
+        "clusters": clusters
+    }
+
+
+def join_and_count(datasets):
+    df_full = (
+        datasets["orders"][["order_id", "customer_id"]]
+        .merge(datasets["order_items"][["order_id", "product_id"]], on="order_id")
+        .merge(datasets["clusters"][["customer_id", "cluster"]], on="customer_id")
+    )
+    return df_full.groupby("cluster")["product_id"].nunique()
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de IdInterner")
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    datasets = synthetic_datasets(args.customers, args.seed)
+    raw_s, raw_counts = best_time(lambda: join_and_count(datasets), args.repeat)
+
+    interner = IdInterner()
+    encoded = interner.encode_datasets({name: df.copy() for name, df in datasets.items()})
+    int_s, int_counts = best_time(lambda: join_and_count(encoded), args.repeat)
+
+    # Mismo resultado: el internado no cambia los conteos
+    pd.testing.assert_series_equal(raw_counts, int_counts)
+
+    print(f"\nMemoria por columna ({args.customers} clientes, "
+          f"{len(datasets['order_items'])} items):")
+    for column, report in sorted(interner.memory_report.items()):
+        print(f"  {column:<26} {report['bytes_before'] / 1024 ** 2:8.2f} MB -> "
+              f"{report['bytes_after'] / 1024 ** 2:6.2f} MB")
+    before = sum(r["bytes_before"] for r in interner.memory_report.values())
+    after = sum(r["bytes_after"] for r in interner.memory_report.values())
+    print(f"  {'total':<26} {before / 1024 ** 2:8.2f} MB -> {after / 1024 ** 2:6.2f} MB")
+
+    print(f"\nJoin pedidos ⋈ items ⋈ clusters + nunique (mejor de {args.repeat}):")
+    print(f"  ids hex  {raw_s:.3f} s")
+    print(f"  int32    {int_s:.3f} s  ({raw_s / int_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATASETS_DIR = BASE_DIR / "data"
+GEO_INDEX_DIR = DATASETS_DIR / "geo_index"
 
 DATASET_FILES = {
     'customers': DATASETS_DIR / "olist_customers_dataset.csv",
@@ -24,6 +25,8 @@ MONGODB_CONFIG = {
         'products': 'products',
         'geolocation': 'geolocation',
         'economic_data': 'economic_data',
-        'processed_results': 'processed_results'
+        'processed_results': 'processed_results',
+        'delivery_cube': 'delivery_cube',
+        'map_tiles': 'map_tiles'
     }
 }
@@ -35,6 +35,7 @@ class MongoDBHandler:
         """
         Inserta una lista de documentos en una colección.
         Si la colección ya existe, la reemplaza completamente.
+        Devuelve False si la inserción falló.
         """
         if self.db is None:
             raise Exception("Base de datos no inicializada. Llamar a connect() primero.")
@@ -51,6 +52,8 @@ class MongoDBHandler:
                 print(f"Colección '{collection_name}' cargada con {len(documents)} documentos.")
             else:
                 print(f"No hay documentos para insertar en '{collection_name}'.")
+            return True
 
         except Exception as e:
             print(f"Error insertando en {collection_name}: {e}")
+            return False
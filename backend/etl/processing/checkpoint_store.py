@@ -0,0 +1,81 @@
+# etl/processing/checkpoint_store.py
+import json
+import os
+import pickle
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+class CheckpointStore:
+    """
+    Guarda las salidas de cada etapa del pipeline en un directorio de corrida
+    local para poder reanudar o re-ejecutar etapas sueltas sin recargar CSVs.
+
+    Cada etapa se serializa con pickle (protocolo binario más reciente, que
+    vuelca los buffers numpy de los DataFrames sin conversión) y se registra
+    en un manifest.json con la fecha, la duración del guardado y los
+    parámetros que produjeron la salida.
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, run_dir):
+        self.run_dir = Path(run_dir)
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest = self._read_manifest()
+
+    def has(self, stage):
+        entry = self.manifest.get(stage)
+        return bool(entry) and (self.run_dir / entry["file"]).exists()
+
+    def completed(self):
+        return [stage for stage in self.manifest if self.has(stage)]
+
+    def params(self, stage):
+        """Parámetros con los que se generó el checkpoint de `stage` (o None)."""
+        entry = self.manifest.get(stage)
+        return entry.get("params") if entry else None
+
+    def save(self, stage, obj, params=None):
+        start = time.perf_counter()
+        file_name = f"{stage}.pkl"
+        tmp_path = self.run_dir / f"{file_name}.tmp"
+
+        # Escritura atómica: un fallo a mitad no deja un checkpoint corrupto
+        with open(tmp_path, "wb") as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.run_dir / file_name)
+
+        self.manifest[stage] = {
+            "file": file_name,
+            "saved_at": datetime.utcnow().isoformat(),
+            "seconds": round(time.perf_counter() - start, 3),
+            "params": params
+        }
+        self._write_manifest()
+        print(f"Checkpoint guardado: {stage}")
+
+    def load(self, stage):
+        if not self.has(stage):
+            raise FileNotFoundError(f"No existe checkpoint para la etapa '{stage}' en {self.run_dir}")
+        with open(self.run_dir / self.manifest[stage]["file"], "rb") as f:
+            return pickle.load(f)
+
+    def invalidate(self, stages):
+        """Descarta del manifest checkpoints que quedaron desactualizados."""
+        removed = [stage for stage in stages if self.manifest.pop(stage, None)]
+        if removed:
+            self._write_manifest()
+        return removed
+
+    def _read_manifest(self):
+        path = self.run_dir / self.MANIFEST
+        if not path.exists():
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self):
+        with open(self.run_dir / self.MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2)
@@ -1,7 +1,16 @@
 import pandas as pd
 from datetime import datetime
+from ..config import DATASET_FILES, GEO_INDEX_DIR
 from .data_cleaner import DataCleaner
+from .delivery_cube import DeliveryCubeBuilder
+from .execution_backend import get_backend
+from .geo_index import ZipGeoIndex
+from .growth_scenarios import GrowthScenarioEngine
+from .heavy_hitters import HeavyHitterTracker
+from .id_interner import IdInterner
 from .metric_calculator import MetricCalculator
+from .stage_graph import StageGraph
+from .tile_pyramid import TilePyramidBuilder
 from .warehouse_allocator import WarehouseAllocator
 
 class DataProcessor:
@@ -9,14 +18,47 @@ class DataProcessor:
     Orquesta el proceso ETL completo con mejoras de clustering, métricas y proyección de crecimiento de clientes.
     """
 
-    def __init__(self, cleaner=None):
+    # Salidas de etapas que se exportan como colecciones propias en MongoDB
+    DERIVED_COLLECTIONS = ("delivery_cube", "map_tiles")
+
+    # Etapas sin las cuales processed_results no tiene sentido
+    REQUIRED_STAGES = ("metrics", "warehouses")
+
+    def __init__(self, cleaner=None, max_workers=4, n_scenarios=10000, growth_horizons=(1, 2, 5),
+                 use_geo_index=False, heavy_hitter_epsilon=0.001, backend="pandas"):
         self.cleaner = cleaner if cleaner else DataCleaner()
+        self.max_workers = max_workers
+        self.use_geo_index = use_geo_index
+        self.heavy_hitter_epsilon = heavy_hitter_epsilon
+        self.backend = backend
+        self.n_scenarios = n_scenarios
+        self.growth_horizons = growth_horizons
         self.calculator = None
+        self.interner = IdInterner()
         self.processed_results = {}
+        self.derived_collections = {}
+        self.stage_status = {}
 
     def execute_etl(self, n_clusters=None):
         print("Iniciando proceso ETL completo...")
 
+        if not self.prepare_datasets():
+            return False
+
+        try:
+            self.run_analysis(n_clusters=n_clusters)
+        except Exception as e:
+            print(f"Error en el cálculo de métricas o ubicación: {e}")
+            return False
+
+        failed = [name for name in self.REQUIRED_STAGES if self.stage_status.get(name) != "ok"]
+        if failed:
+            print(f"Error: etapas requeridas sin completar: {failed}")
+            return False
+        return True
+
+    def prepare_datasets(self):
+        """Carga, filtra, limpia e interna los ids de todos los datasets."""
         if not self.cleaner.load_all_datasets():
             print("Error cargando datasets.")
             return False
@@ -25,92 +67,260 @@ class DataProcessor:
         self.cleaner.filter_delivered_orders()
         self.cleaner.clean_datasets()
 
-        # Instanciar metric calculator
-        try:
-            self.calculator = MetricCalculator(
-                df_orders=self.cleaner.datasets.get("orders"),
-                df_items=self.cleaner.datasets.get("order_items"),
-                df_customers=self.cleaner.datasets.get("customers"),
-                df_geolocation=self.cleaner.datasets.get("geolocation"),
-                df_economic=self.cleaner.datasets.get("economic_indicators"),
-                df_products=self.cleaner.datasets.get("products")
-            )
-        except Exception as e:
-            print(f"Error al instanciar MetricCalculator: {e}")
-            return False
+        # Ids hexadecimales -> códigos int32 para merges y groupbys
+        self.interner.encode_datasets(self.cleaner.datasets)
+        return True
 
-        print("Calculando métricas y ubicaciones de warehouses...")
+    def get_dataset_state(self):
+        """Estado mínimo para reanudar el pipeline sin recargar los CSVs."""
+        return {"datasets": self.cleaner.get_all_datasets(), "interner": self.interner}
 
-        try:
-            # 1) Calcular métricas generales y económicas
-            results_base = self.calculator.calculate_all()
-
-            # 2) Estimar warehouses
-            allocator = WarehouseAllocator(
-                df_orders=self.cleaner.datasets.get("orders"),
-                df_customers=self.cleaner.datasets.get("customers"),
-                df_geolocation=self.cleaner.datasets.get("geolocation"),
-                df_items=self.cleaner.datasets.get("order_items"),
-                df_products=self.cleaner.datasets.get("products"),
-                n_clusters=n_clusters
-            )
-            warehouses = allocator.estimate()
-
-            # 3) Proyección de crecimiento de clientes por warehouse (1 y 2 años)
-            econ = results_base.get("economic_analysis", {}).get("national_correlations", {})
-            econ_act = econ.get("econ_act", 0.0)
-            peo_debt = econ.get("peo_debt", 0.0)
-            inflation = econ.get("inflation", 0.0)
-            interest_rate = econ.get("interest_rate", 0.0)
-
-            # Normalización simple 0-1
-            norm_econ_act = min(max(econ_act,0),1)
-            norm_peo_debt = min(max(peo_debt,0),1)
-            norm_inflation = min(max(inflation,0),1)
-            norm_interest_rate = min(max(interest_rate,0),1)
-
-            for w in warehouses:
-                growth_factor = 0.5*norm_econ_act - 0.2*norm_peo_debt - 0.1*norm_inflation - 0.1*norm_interest_rate
-                w["estimated_customer_growth_1y"] = int(w["customer_count"] * (1 + growth_factor))
-                w["estimated_customer_growth_2y"] = int(w["customer_count"] * (1 + growth_factor)**2)
-
-            # 4) Construir processed_results
-            processed = {
-                "timestamp": datetime.utcnow().isoformat(),
-                "metrics": results_base.get("metrics", {}),
-                "economic_analysis": results_base.get("economic_analysis", {}),
-                "delivery_stats": results_base.get("delivery_stats", {}),
-                "warehouses": warehouses,
-                "cluster_logs": allocator.logs,
-                "notes": {
-                    "clustering_method": "KMeans",
-                    "n_clusters": allocator.n_clusters
-                }
-            }
+    def restore_dataset_state(self, state):
+        self.cleaner.datasets = state["datasets"]
+        self.interner = state["interner"]
 
-            total_wh = len(warehouses)
-            processed["metrics"]["total_warehouses"] = total_wh
-            if total_wh > 0:
-                processed["metrics"]["avg_customers_per_warehouse"] = int(
-                    processed["metrics"]["total_customers"] / total_wh
-                )
+    def run_analysis(self, n_clusters=None, only=None, context=None, on_stage_complete=None):
+        """
+        Ejecuta las etapas de análisis y construye processed_results.
 
-            self.processed_results = processed
+        `only` limita las etapas a ejecutar; `context` aporta las salidas de
+        las etapas restantes (p.ej. leídas de checkpoints).
+        """
+        self.calculator = MetricCalculator(
+            df_orders=self.cleaner.datasets.get("orders"),
+            df_items=self.cleaner.datasets.get("order_items"),
+            df_customers=self.cleaner.datasets.get("customers"),
+            df_geolocation=self.cleaner.datasets.get("geolocation"),
+            df_economic=self.cleaner.datasets.get("economic_indicators"),
+            df_products=self.cleaner.datasets.get("products")
+        )
+
+        print("Calculando métricas y ubicaciones de warehouses...")
+
+        # Las etapas independientes corren en paralelo; un fallo no aborta al resto
+        graph = self.build_stage_graph(n_clusters)
+        outputs = graph.run(context=context, only=only, on_complete=on_stage_complete)
+        self.stage_status = dict(graph.status)
+        self.processed_results = self._build_processed_results(outputs, graph)
+        self.derived_collections = {
+            name: outputs[name] for name in self.DERIVED_COLLECTIONS if name in outputs
+        }
+
+        failed = [name for name, status in graph.status.items() if status != "ok"]
+        if failed:
+            print(f"Proceso ETL completado con etapas fallidas u omitidas: {failed}")
+        else:
             print("Proceso ETL completado correctamente.")
-            return True
+        return outputs
 
-        except Exception as e:
-            print(f"Error en el cálculo de métricas o ubicación: {e}")
-            return False
+    def build_stage_graph(self, n_clusters=None):
+        """
+        Declara las etapas de análisis y sus dependencias. Las métricas, el
+        análisis de entregas, el económico y el clustering solo comparten
+        datasets de lectura y pueden correr en paralelo.
+        """
+        calc = self.calculator
+        graph = StageGraph(max_workers=self.max_workers)
+        graph.add_stage("metrics", lambda _: calc._generate_metrics())
+        graph.add_stage("delivery_stats", lambda _: calc._analyze_delivery_performance())
+        graph.add_stage("economic_analysis", lambda _: calc._analyze_economic_relations_and_trend())
+        graph.add_stage(
+            "warehouses",
+            lambda _: self._estimate_warehouses(n_clusters),
+            outputs=("estimated_warehouses", "cluster_logs", "n_clusters", "customer_clusters")
+        )
+        graph.add_stage(
+            "growth",
+            self._project_customer_growth,
+            inputs=("estimated_warehouses",),
+            optional_inputs=("economic_analysis",),
+            outputs=("warehouses",)
+        )
+        graph.add_stage(
+            "top_products",
+            self._track_top_products,
+            inputs=("customer_clusters",),
+            outputs=("top_products", "heavy_hitters")
+        )
+        graph.add_stage(
+            "delivery_cube",
+            lambda inputs: DeliveryCubeBuilder(
+                self.cleaner.datasets.get("orders"),
+                self.cleaner.datasets.get("customers"),
+                inputs.get("customer_clusters")
+            ).build(),
+            optional_inputs=("customer_clusters",)
+        )
+        graph.add_stage(
+            "map_tiles",
+            lambda inputs: TilePyramidBuilder(
+                inputs["customer_clusters"],
+                self.cleaner.datasets.get("orders"),
+                inputs.get("estimated_warehouses")
+            ).build(),
+            inputs=("customer_clusters",),
+            optional_inputs=("estimated_warehouses",)
+        )
+        return graph
+
+    def _estimate_warehouses(self, n_clusters):
+        geo_index = None
+        if self.use_geo_index:
+            geo_index = ZipGeoIndex.open_or_build(DATASET_FILES["geolocation"], GEO_INDEX_DIR)
+
+        allocator = WarehouseAllocator(
+            df_orders=self.cleaner.datasets.get("orders"),
+            df_customers=self.cleaner.datasets.get("customers"),
+            df_geolocation=self.cleaner.datasets.get("geolocation"),
+            df_items=self.cleaner.datasets.get("order_items"),
+            n_clusters=n_clusters,
+            geo_index=geo_index,
+            backend=get_backend(self.backend)
+        )
+        warehouses = allocator.estimate()
+        return {
+            "estimated_warehouses": warehouses,
+            "cluster_logs": allocator.logs,
+            "n_clusters": allocator.n_clusters,
+            "customer_clusters": allocator.customer_clusters
+        }
+
+    def _project_customer_growth(self, inputs):
+        # Proyección de crecimiento de clientes por warehouse (1 y 2 años)
+        econ = (inputs.get("economic_analysis") or {}).get("national_correlations", {})
+        econ_act = econ.get("econ_act") or 0.0
+        peo_debt = econ.get("peo_debt") or 0.0
+        inflation = econ.get("inflation") or 0.0
+        interest_rate = econ.get("interest_rate") or 0.0
+
+        # Normalización simple 0-1
+        norm_econ_act = min(max(econ_act,0),1)
+        norm_peo_debt = min(max(peo_debt,0),1)
+        norm_inflation = min(max(inflation,0),1)
+        norm_interest_rate = min(max(interest_rate,0),1)
+
+        growth_factor = 0.5*norm_econ_act - 0.2*norm_peo_debt - 0.1*norm_inflation - 0.1*norm_interest_rate
+
+        warehouses = []
+        for w in inputs["estimated_warehouses"]:
+            w = dict(w)
+            w["estimated_customer_growth_1y"] = int(w["customer_count"] * (1 + growth_factor))
+            w["estimated_customer_growth_2y"] = int(w["customer_count"] * (1 + growth_factor)**2)
+            warehouses.append(w)
+
+        # Bandas de percentiles por simulación de trayectorias económicas históricas
+        engine = GrowthScenarioEngine(
+            self.cleaner.datasets.get("economic_indicators"),
+            n_scenarios=self.n_scenarios,
+            horizons=self.growth_horizons
+        )
+        return engine.attach(warehouses, base_growth_factor=growth_factor)
+
+    def _track_top_products(self, inputs):
+        # Contexto por pedido (cluster, estado, mes) para recorrer order_items en chunks
+        orders = self.cleaner.datasets.get("orders")
+        customers = self.cleaner.datasets.get("customers").drop_duplicates("customer_id")
+        clusters = inputs["customer_clusters"].set_index("customer_id")["cluster"]
+        products = self.cleaner.datasets.get("products").drop_duplicates("product_id")
+
+        order_context = orders.drop_duplicates("order_id").set_index("order_id")
+        order_context = pd.DataFrame({
+            "cluster": order_context["customer_id"].map(clusters).astype("Int64"),
+            "state": order_context["customer_id"].map(customers.set_index("customer_id")["customer_state"]),
+            "month": pd.to_datetime(order_context["order_purchase_timestamp"], errors="coerce")
+                       .dt.to_period("M").astype(str).replace("NaT", None)
+        })
+
+        tracker = HeavyHitterTracker(top_n=5, epsilon=self.heavy_hitter_epsilon)
+        tracker.stream_order_items(
+            self.cleaner.datasets.get("order_items"),
+            order_context,
+            products.set_index("product_id")["product_category_name"]
+        )
+        return {"top_products": tracker.summary(), "heavy_hitters": tracker}
+
+    def _build_processed_results(self, outputs, graph):
+        warehouses = self._attach_top_items(
+            outputs.get("warehouses", outputs.get("estimated_warehouses", [])),
+            outputs.get("heavy_hitters")
+        )
+        processed = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "metrics": dict(outputs.get("metrics", {})),
+            "economic_analysis": outputs.get("economic_analysis", {}),
+            "delivery_stats": outputs.get("delivery_stats", {}),
+            "warehouses": warehouses,
+            "cluster_logs": outputs.get("cluster_logs", []),
+            "top_products": outputs.get("top_products", {}),
+            "notes": {
+                "clustering_method": "KMeans",
+                "n_clusters": outputs.get("n_clusters")
+            },
+            "stages": {
+                "status": graph.status,
+                "errors": graph.errors,
+                "timings_s": graph.timings
+            }
+        }
+
+        total_wh = len(warehouses)
+        processed["metrics"]["total_warehouses"] = total_wh
+        if total_wh > 0 and "total_customers" in processed["metrics"]:
+            processed["metrics"]["avg_customers_per_warehouse"] = int(
+                processed["metrics"]["total_customers"] / total_wh
+            )
+        return processed
 
     def get_processed_data(self):
+        # Los datasets guardan códigos int32: se devuelven con los ids originales
+        datasets = self.cleaner.get_all_datasets()
         return {
-            "datasets_originales": self.cleaner.get_all_datasets(),
-            "processed_results": self.processed_results,
+            "datasets_originales": {name: self.interner.decode_frame(df) for name, df in datasets.items()},
+            "processed_results": self._decode_processed_results() if self.processed_results else {},
         }
 
     def prepare_mongodb_documents(self):
         datasets = self.cleaner.get_all_datasets()
-        mongo_docs = {name: df.to_dict("records") for name, df in datasets.items()}
-        mongo_docs["processed_results"] = [self.processed_results]
+        mongo_docs = {
+            name: self.interner.decode_frame(df).to_dict("records")
+            for name, df in datasets.items()
+        }
+        mongo_docs["processed_results"] = [self._decode_processed_results()]
+        mongo_docs.update(self.derived_collections)
         return mongo_docs
+
+    @staticmethod
+    def _attach_top_items(warehouses, tracker):
+        # Única fuente de productos más vendidos: items de pedido por cluster del tracker
+        def top_items(cluster_id):
+            if tracker is None:
+                return []
+            return [key for key, _, _ in tracker.top("product_id", "cluster", cluster_id)]
+
+        return [{**w, "top_items": top_items(w.get("cluster_id"))} for w in warehouses]
+
+    def _decode_processed_results(self):
+        # Los top_items se calculan sobre códigos internos: traducir a product_id
+        results = dict(self.processed_results)
+        results["warehouses"] = [
+            {**w, "top_items": self.interner.decode("product_id", w.get("top_items", []))}
+            for w in results.get("warehouses", [])
+        ]
+        top_products = results.get("top_products", {})
+        if "product_id" in top_products:
+            results["top_products"] = {
+                **top_products,
+                "product_id": {
+                    dim: {
+                        group: [
+                            {**entry, "item": product_id}
+                            for entry, product_id in zip(
+                                entries, self.interner.decode("product_id", [e["item"] for e in entries])
+                            )
+                        ]
+                        for group, entries in groups.items()
+                    }
+                    for dim, groups in top_products["product_id"].items()
+                }
+            }
+        return results
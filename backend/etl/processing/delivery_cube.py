@@ -0,0 +1,76 @@
+# etl/processing/delivery_cube.py
+import numpy as np
+import pandas as pd
+
+
+class DeliveryCubeBuilder:
+    """
+    Materializa un cubo de entregas estado × mes × cluster en una sola
+    pasada de groupby: cantidad de pedidos, días promedio y mediana, y
+    participación de cada clase de velocidad (fast/medium/slow).
+
+    Las clases usan los mismos percentiles nacionales p25/p75 que
+    MetricCalculator, así que los totales del cubo son consistentes con
+    delivery_stats. Cada celda lleva un `_id` "estado|mes|cluster" para
+    consultas directas por clave en MongoDB.
+    """
+
+    UNASSIGNED_CLUSTER = -1
+
+    def __init__(self, df_orders, df_customers, customer_clusters=None):
+        self.df_orders = df_orders
+        self.df_customers = df_customers
+        self.customer_clusters = customer_clusters
+
+    def build(self):
+        print("Construyendo cubo de entregas (estado × mes × cluster)...")
+
+        df = self.df_orders[["customer_id", "order_purchase_timestamp", "order_delivered_customer_date"]].copy()
+        purchase = pd.to_datetime(df["order_purchase_timestamp"], errors="coerce")
+        delivered = pd.to_datetime(df["order_delivered_customer_date"], errors="coerce")
+        df["delivery_days"] = (delivered - purchase).dt.days
+        df["month"] = purchase.dt.to_period("M").astype(str)
+        df = df.dropna(subset=["delivery_days"])
+
+        if df.empty:
+            return []
+
+        # Join único pedidos -> clientes (estado) -> clusters
+        customers = self.df_customers.drop_duplicates("customer_id").set_index("customer_id")
+        df["state"] = df["customer_id"].map(customers["customer_state"]).fillna("NA")
+        if self.customer_clusters is not None:
+            clusters = self.customer_clusters.set_index("customer_id")["cluster"]
+            df["cluster"] = df["customer_id"].map(clusters)
+        else:
+            df["cluster"] = np.nan
+        df["cluster"] = df["cluster"].fillna(self.UNASSIGNED_CLUSTER).astype(np.int64)
+
+        p25, p75 = np.percentile(df["delivery_days"], [25, 75])
+        days = df["delivery_days"].to_numpy()
+        df["fast"] = days <= p25
+        df["medium"] = (days > p25) & (days <= p75)
+        df["slow"] = days > p75
+
+        cube = (
+            df.groupby(["state", "month", "cluster"])
+            .agg(
+                orders=("delivery_days", "size"),
+                avg_delivery_days=("delivery_days", "mean"),
+                median_delivery_days=("delivery_days", "median"),
+                fast_share=("fast", "mean"),
+                medium_share=("medium", "mean"),
+                slow_share=("slow", "mean")
+            )
+            .reset_index()
+        )
+
+        cube["_id"] = cube["state"] + "|" + cube["month"] + "|" + cube["cluster"].astype(str)
+        cube["orders"] = cube["orders"].astype(int)
+        cube["cluster"] = cube["cluster"].astype(int)
+        for col in ["avg_delivery_days", "median_delivery_days"]:
+            cube[col] = cube[col].round(2)
+        for col in ["fast_share", "medium_share", "slow_share"]:
+            cube[col] = cube[col].round(4)
+
+        print(f"Cubo de entregas: {len(cube)} celdas")
+        return cube.to_dict(orient="records")
@@ -0,0 +1,212 @@
+# etl/processing/execution_backend.py
+import numpy as np
+import pandas as pd
+
+
+class PandasBackend:
+    """
+    Backend de referencia para las etapas con joins pesados de
+    WarehouseAllocator. Proyecta solo las columnas necesarias antes de cada
+    merge; los backends alternativos deben devolver exactamente lo mismo.
+    """
+
+    name = "pandas"
+
+    def customer_coordinates(self, df_customers, df_geolocation):
+        """
+        Clientes ⋈ geolocalización por prefijo postal (left join, orden de
+        pandas: filas de clientes y, dentro de cada una, filas de geolocalización).
+        Devuelve customer_id, geolocation_lat, geolocation_lng sin nulos.
+        """
+        df_merge = pd.merge(
+            df_customers[["customer_id", "customer_zip_code_prefix"]],
+            df_geolocation[["geolocation_zip_code_prefix", "geolocation_lat", "geolocation_lng"]],
+            left_on="customer_zip_code_prefix",
+            right_on="geolocation_zip_code_prefix",
+            how="left"
+        )
+        df_merge["geolocation_lat"] = pd.to_numeric(df_merge["geolocation_lat"], errors="coerce")
+        df_merge["geolocation_lng"] = pd.to_numeric(df_merge["geolocation_lng"], errors="coerce")
+        df_merge = df_merge.dropna(subset=["geolocation_lat", "geolocation_lng"])
+        return df_merge[["customer_id", "geolocation_lat", "geolocation_lng"]].reset_index(drop=True)
+
+    def clusters_with_sales(self, df_orders, df_items, df_clusters):
+        """
+        Clusters (ordenados) con al menos un item de pedido: semi-join
+        clusters ⋉ pedidos ⋉ items, sin materializar el join ni contar productos.
+        """
+        sold_orders = df_items.loc[df_items["product_id"].notna(), "order_id"]
+        buyers = df_orders.loc[df_orders["order_id"].isin(sold_orders), "customer_id"]
+        clusters = df_clusters.loc[df_clusters["customer_id"].isin(buyers), "cluster"].dropna()
+        return sorted(int(c) for c in clusters.unique())
+
+
+class DuckDBBackend:
+    """
+    Backend embebido DuckDB: filtros, ordenamientos y semi-joins SQL
+    multi-thread. En un solo núcleo rinde como pandas; la ventaja crece
+    con los núcleos disponibles.
+    """
+
+    name = "duckdb"
+
+    def __init__(self):
+        import duckdb
+        self.duckdb = duckdb
+
+    def customer_coordinates(self, df_customers, df_geolocation):
+        """
+        DuckDB filtra y ordena solo la geolocalización por (prefijo, fila
+        original), dejando los puntos de cada prefijo contiguos. El left join
+        se resuelve expandiendo esos rangos en el orden de los clientes, sin
+        ordenar el resultado completo (un ORDER BY de millones de filas).
+        """
+        con = self.duckdb.connect()
+        try:
+            con.register("geo", df_geolocation[["geolocation_zip_code_prefix", "geolocation_lat", "geolocation_lng"]])
+            geo = con.execute("""
+                SELECT zip, geolocation_lat, geolocation_lng
+                FROM (
+                    SELECT geolocation_zip_code_prefix AS zip,
+                           TRY_CAST(geolocation_lat AS DOUBLE) AS geolocation_lat,
+                           TRY_CAST(geolocation_lng AS DOUBLE) AS geolocation_lng,
+                           row_number() OVER () AS rn
+                    FROM geo
+                )
+                WHERE zip IS NOT NULL
+                  AND geolocation_lat IS NOT NULL AND geolocation_lng IS NOT NULL
+                  AND NOT isnan(geolocation_lat) AND NOT isnan(geolocation_lng)
+                ORDER BY zip, rn
+            """).fetchnumpy()
+        finally:
+            con.close()
+        return _expand_in_customer_order(df_customers, geo)
+
+    def clusters_with_sales(self, df_orders, df_items, df_clusters):
+        con = self.duckdb.connect()
+        try:
+            con.register("orders", df_orders[["order_id", "customer_id"]])
+            con.register("items", df_items[["order_id", "product_id"]])
+            con.register("clusters", df_clusters[["customer_id", "cluster"]])
+            clusters = con.execute("""
+                SELECT DISTINCT k.cluster
+                FROM clusters k
+                SEMI JOIN (
+                    SELECT o.customer_id
+                    FROM orders o
+                    SEMI JOIN items i ON o.order_id = i.order_id AND i.product_id IS NOT NULL
+                ) b ON k.customer_id = b.customer_id
+                WHERE k.cluster IS NOT NULL
+            """).fetchall()
+        finally:
+            con.close()
+        return sorted(int(c) for (c,) in clusters)
+
+
+class PolarsBackend:
+    """
+    Backend Polars con lazy frames: proyección y joins multi-thread. En un
+    solo núcleo rinde como pandas; la ventaja crece con los núcleos.
+    """
+
+    name = "polars"
+
+    def __init__(self):
+        import polars
+        self.pl = polars
+
+    def customer_coordinates(self, df_customers, df_geolocation):
+        pl = self.pl
+        cust = pl.from_pandas(df_customers[["customer_id", "customer_zip_code_prefix"]]).lazy()
+        geo = (
+            pl.from_pandas(df_geolocation[["geolocation_zip_code_prefix", "geolocation_lat", "geolocation_lng"]])
+            .lazy()
+            .with_columns(
+                pl.col("geolocation_lat").cast(pl.Float64, strict=False),
+                pl.col("geolocation_lng").cast(pl.Float64, strict=False)
+            )
+        )
+        # maintain_order="left_right" da el orden de pandas sin ordenar el resultado
+        df = (
+            cust.join(
+                geo, left_on="customer_zip_code_prefix", right_on="geolocation_zip_code_prefix",
+                how="left", maintain_order="left_right"
+            )
+            .filter(
+                pl.col("geolocation_lat").is_not_null() & pl.col("geolocation_lng").is_not_null()
+                & pl.col("geolocation_lat").is_not_nan() & pl.col("geolocation_lng").is_not_nan()
+            )
+            .select(["customer_id", "geolocation_lat", "geolocation_lng"])
+            .collect()
+        )
+        df = _polars_to_pandas(df)
+        return df.astype({"customer_id": df_customers["customer_id"].dtype})
+
+    def clusters_with_sales(self, df_orders, df_items, df_clusters):
+        pl = self.pl
+        orders = pl.from_pandas(df_orders[["order_id", "customer_id"]]).lazy()
+        items = pl.from_pandas(df_items[["order_id", "product_id"]]).lazy().drop_nulls("product_id")
+        clusters = pl.from_pandas(df_clusters[["customer_id", "cluster"]]).lazy()
+        sold = (
+            clusters.join(orders.join(items, on="order_id", how="semi"), on="customer_id", how="semi")
+            .select(pl.col("cluster").drop_nulls().unique())
+            .collect()
+        )
+        return sorted(int(c) for c in sold["cluster"].to_list())
+
+
+BACKENDS = {
+    "pandas": PandasBackend,
+    "duckdb": DuckDBBackend,
+    "polars": PolarsBackend,
+}
+
+
+def get_backend(name="pandas"):
+    """Instancia el backend pedido; si su dependencia no está instalada usa pandas."""
+    if name not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {name}. Opciones: {list(BACKENDS)}")
+    try:
+        return BACKENDS[name]()
+    except ImportError as e:
+        print(f"Backend '{name}' no disponible ({e}); usando pandas.")
+        return PandasBackend()
+
+
+def _expand_in_customer_order(df_customers, geo):
+    """
+    Left join por prefijo con el orden de pandas a partir de `geo` (dict de
+    arrays zip, geolocation_lat, geolocation_lng) ordenado por prefijo: cada
+    cliente recibe, en su posición, el rango contiguo de puntos de su prefijo.
+    """
+    customer_ids = df_customers["customer_id"].to_numpy()
+    cust_zip = df_customers["customer_zip_code_prefix"].to_numpy()
+    zips = geo["zip"]
+    if len(zips) == 0:
+        return pd.DataFrame({
+            "customer_id": customer_ids[:0],
+            "geolocation_lat": np.empty(0),
+            "geolocation_lng": np.empty(0)
+        })
+
+    # Inicio y tamaño del rango de cada prefijo en `geo`
+    first = np.flatnonzero(np.r_[True, zips[1:] != zips[:-1]])
+    counts = np.diff(np.r_[first, len(zips)])
+    unique = zips[first]
+
+    slot = np.minimum(np.searchsorted(unique, cust_zip), len(unique) - 1)
+    n_points = np.where(unique[slot] == cust_zip, counts[slot], 0)
+
+    # Posición de cada punto: inicio del rango del prefijo + desplazamiento dentro de él
+    out_start = np.cumsum(n_points) - n_points
+    idx = np.repeat(first[slot] - out_start, n_points) + np.arange(n_points.sum())
+    return pd.DataFrame({
+        "customer_id": np.repeat(customer_ids, n_points),
+        "geolocation_lat": np.asarray(geo["geolocation_lat"], dtype=float)[idx],
+        "geolocation_lng": np.asarray(geo["geolocation_lng"], dtype=float)[idx]
+    })
+
+
+def _polars_to_pandas(df):
+    # Vía numpy: DataFrame.to_pandas de polars exige pyarrow
+    return pd.DataFrame({col: df[col].to_numpy() for col in df.columns})
@@ -0,0 +1,186 @@
+# etl/processing/geo_index.py
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+class ZipGeoIndex:
+    """
+    Índice geográfico por prefijo de código postal respaldado por arrays .npy.
+
+    Los prefijos brasileños tienen 5 dígitos, así que el índice es una tabla
+    de acceso directo de 100.000 posiciones: lat y lng medias y cantidad de
+    puntos del CSV de geolocalización por prefijo. Los arrays se abren con
+    memory-map, por lo que varios procesos comparten las mismas páginas y la
+    apertura es prácticamente instantánea. El índice se reconstruye solo si
+    cambia el tamaño o la fecha de modificación del CSV de origen.
+
+    Cada construcción escribe sus arrays en un directorio propio (`v-*`) y se
+    publica reemplazando meta.json, que apunta a esa versión: un lector ve
+    siempre lat, lng y count de la misma construcción. Entre procesos, solo
+    el que toma `build.lock` construye; el resto espera y abre esa versión.
+    """
+
+    SIZE = 100_000
+    ARRAYS = ("lat", "lng", "count")
+    META_FILE = "meta.json"
+    LOCK_FILE = "build.lock"
+    LOCK_TIMEOUT_S = 600
+    OPEN_ATTEMPTS = 5
+
+    def __init__(self, index_dir):
+        self.index_dir = Path(index_dir)
+        self.version = None
+        self.lat = None
+        self.lng = None
+        self.count = None
+
+    @classmethod
+    def open_or_build(cls, source_path, index_dir):
+        index = cls(index_dir)
+        for _ in range(cls.OPEN_ATTEMPTS):
+            if index.is_stale(source_path):
+                with index._build_lock():
+                    # Otro proceso pudo publicar el índice mientras se esperaba el lock
+                    if index.is_stale(source_path):
+                        index.build(source_path)
+            try:
+                index.open()
+            except FileNotFoundError:
+                # La versión leída de meta.json fue reemplazada antes de abrirla
+                continue
+            # Revalidar con los archivos ya abiertos: la versión sigue publicada y vigente
+            if index._read_meta().get("version") == index.version and not index.is_stale(source_path):
+                return index
+        raise RuntimeError(f"No se pudo abrir un índice geográfico consistente en {index.index_dir}")
+
+    def is_stale(self, source_path):
+        meta = self._read_meta()
+        if not meta.get("version"):
+            return True
+        version_dir = self.index_dir / meta["version"]
+        if any(not (version_dir / f"{name}.npy").exists() for name in self.ARRAYS):
+            return True
+        return meta.get("source") != self._source_signature(source_path)
+
+    def build(self, source_path):
+        print(f"Construyendo índice geográfico desde {source_path}...")
+        signature = self._source_signature(source_path)
+        df = pd.read_csv(
+            source_path,
+            usecols=["geolocation_zip_code_prefix", "geolocation_lat", "geolocation_lng"]
+        )
+        return self.build_from_frame(df, source=signature)
+
+    def build_from_frame(self, df_geolocation, source=None):
+        zips = pd.to_numeric(df_geolocation["geolocation_zip_code_prefix"], errors="coerce")
+        lat = pd.to_numeric(df_geolocation["geolocation_lat"], errors="coerce")
+        lng = pd.to_numeric(df_geolocation["geolocation_lng"], errors="coerce")
+
+        valid = zips.notna() & lat.notna() & lng.notna() & zips.between(0, self.SIZE - 1)
+        zips = zips[valid].to_numpy(dtype=np.int64)
+
+        count = np.bincount(zips, minlength=self.SIZE)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_lat = np.bincount(zips, weights=lat[valid].to_numpy(), minlength=self.SIZE) / count
+            mean_lng = np.bincount(zips, weights=lng[valid].to_numpy(), minlength=self.SIZE) / count
+
+        # Directorio propio por construcción: ningún otro proceso escribe en él
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        build_dir = Path(tempfile.mkdtemp(prefix=".build-", dir=self.index_dir))
+        arrays = {"lat": mean_lat, "lng": mean_lng, "count": count.astype(np.int32)}
+        for name, values in arrays.items():
+            np.save(build_dir / f"{name}.npy", values)
+
+        version_dir = self.index_dir / f"v-{build_dir.name[len('.build-'):]}"
+        os.rename(build_dir, version_dir)
+        self._write_meta({"source": source, "version": version_dir.name})
+        self._remove_old_versions(version_dir.name)
+
+        print(f"Índice geográfico construido: {int((count > 0).sum())} prefijos con coordenadas")
+        return self
+
+    def open(self, mmap=True):
+        """Abre la versión publicada en meta.json (FileNotFoundError si no hay)."""
+        version = self._read_meta().get("version")
+        if not version:
+            raise FileNotFoundError(f"No hay índice geográfico publicado en {self.index_dir}")
+        mode = "r" if mmap else None
+        version_dir = self.index_dir / version
+        self.lat = np.load(version_dir / "lat.npy", mmap_mode=mode)
+        self.lng = np.load(version_dir / "lng.npy", mmap_mode=mode)
+        self.count = np.load(version_dir / "count.npy", mmap_mode=mode)
+        self.version = version
+        return self
+
+    def lookup(self, zip_prefixes):
+        """
+        Búsqueda por lotes. Devuelve (lat, lng, count); los prefijos inválidos
+        o sin datos devuelven NaN y 0.
+        """
+        zips = pd.to_numeric(pd.Series(np.asarray(zip_prefixes).ravel()), errors="coerce").to_numpy()
+        valid = ~np.isnan(zips) & (zips >= 0) & (zips < self.SIZE)
+        idx = np.where(valid, zips, 0).astype(np.int64)
+
+        lat = np.where(valid, self.lat[idx], np.nan)
+        lng = np.where(valid, self.lng[idx], np.nan)
+        count = np.where(valid, self.count[idx], 0)
+        return lat, lng, count
+
+    def _read_meta(self):
+        try:
+            with open(self.index_dir / self.META_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_meta(self, meta):
+        # Temporal único por escritor; os.replace publica la versión de una vez
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{self.META_FILE}.", dir=self.index_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self.index_dir / self.META_FILE)
+
+    def _remove_old_versions(self, current):
+        # Los procesos que ya mapearon una versión vieja conservan sus páginas;
+        # los que la abren tarde reciben FileNotFoundError y reintentan.
+        # También descarta los arrays sueltos del formato sin versiones
+        for path in self.index_dir.glob("v-*"):
+            if path.name != current:
+                shutil.rmtree(path, ignore_errors=True)
+        for name in self.ARRAYS:
+            (self.index_dir / f"{name}.npy").unlink(missing_ok=True)
+
+    @contextmanager
+    def _build_lock(self, poll_s=0.2):
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        lock_path = self.index_dir / self.LOCK_FILE
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                # Un lock abandonado por un proceso caído se descarta tras LOCK_TIMEOUT_S
+                try:
+                    if time.time() - lock_path.stat().st_mtime > self.LOCK_TIMEOUT_S:
+                        lock_path.unlink()
+                except FileNotFoundError:
+                    pass
+                time.sleep(poll_s)
+        os.close(fd)
+        try:
+            yield
+        finally:
+            lock_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _source_signature(source_path):
+        stat = os.stat(source_path)
+        return {"path": str(Path(source_path).resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
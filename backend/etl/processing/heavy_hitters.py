@@ -0,0 +1,177 @@
+# etl/processing/heavy_hitters.py
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class SpaceSavingSketch:
+    """
+    Resumen Space-Saving mergeable para contar los elementos más frecuentes.
+
+    Con `capacity` contadores, cada conteo reportado sobreestima el real en
+    a lo sumo su `error`, y ese error es <= total / capacity. Cualquier
+    elemento no monitoreado tiene un conteo real <= `min_count()`. Con
+    capacity=None el sketch es exacto (sin truncado, error 0).
+    """
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.errors = pd.Series(dtype=np.int64)
+        self.total = 0
+
+    @classmethod
+    def for_error(cls, epsilon):
+        """Sketch con capacidad suficiente para error <= epsilon * total."""
+        return cls(capacity=math.ceil(1 / epsilon))
+
+    def is_full(self):
+        return self.capacity is not None and len(self.counts) >= self.capacity
+
+    def min_count(self):
+        return int(self.counts.min()) if self.is_full() else 0
+
+    def error_bound(self):
+        return 0 if self.capacity is None else self.total / self.capacity
+
+    def update(self, counts):
+        """Incorpora conteos exactos de un chunk (Series elemento -> conteo)."""
+        counts = counts[counts > 0].astype(np.int64)
+        self._merge(counts, pd.Series(0, index=counts.index, dtype=np.int64), 0, int(counts.sum()))
+        return self
+
+    def merge(self, other):
+        """Combina otro sketch (de otro chunk o de una corrida anterior)."""
+        self._merge(other.counts, other.errors, other.min_count(), other.total)
+        return self
+
+    def top(self, n):
+        """Lista de (elemento, conteo, error) ordenada por conteo desc y elemento asc."""
+        if self.counts.empty:
+            return []
+        order = np.lexsort((self.counts.index.to_numpy(), -self.counts.to_numpy()))[:n]
+        keys = self.counts.index.to_numpy()[order].tolist()
+        return [
+            (key, int(self.counts.iloc[i]), int(self.errors.iloc[i]))
+            for key, i in zip(keys, order)
+        ]
+
+    def to_dict(self):
+        return {
+            "capacity": self.capacity,
+            "total": self.total,
+            "items": [[key, int(c), int(self.errors[key])] for key, c in self.counts.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(capacity=state["capacity"])
+        items = state["items"]
+        index = [key for key, _, _ in items]
+        sketch.counts = pd.Series([c for _, c, _ in items], index=index, dtype=np.int64)
+        sketch.errors = pd.Series([e for _, _, e in items], index=index, dtype=np.int64)
+        sketch.total = state["total"]
+        return sketch
+
+    def _merge(self, counts, errors, other_min, other_total):
+        # Un elemento ausente en un sketch lleno pudo tener hasta su min_count
+        self_min = self.min_count()
+        keys = self.counts.index.union(counts.index)
+
+        merged_counts = (
+            self.counts.reindex(keys, fill_value=self_min)
+            + counts.reindex(keys, fill_value=other_min)
+        )
+        merged_errors = (
+            self.errors.reindex(keys, fill_value=self_min)
+            + errors.reindex(keys, fill_value=other_min)
+        )
+
+        if self.capacity is not None and len(merged_counts) > self.capacity:
+            keep = merged_counts.nlargest(self.capacity, keep="first").index
+            merged_counts = merged_counts.loc[keep]
+            merged_errors = merged_errors.loc[keep]
+
+        self.counts = merged_counts.astype(np.int64)
+        self.errors = merged_errors.astype(np.int64)
+        self.total += other_total
+
+
+class HeavyHitterTracker:
+    """
+    Mantiene los productos y categorías más vendidos por cluster, estado y
+    mes procesando order_items en chunks, sin materializar el join completo
+    orders ⋈ items ⋈ products ⋈ clusters.
+
+    Hay un sketch por (elemento, dimensión, grupo). Los trackers de distintos
+    chunks o corridas incrementales se combinan con `merge`.
+    """
+
+    DIMENSIONS = ("cluster", "state", "month")
+    ITEMS = ("product_id", "product_category_name")
+
+    def __init__(self, top_n=5, epsilon=0.001, exact=False):
+        self.top_n = top_n
+        self.epsilon = epsilon
+        self.exact = exact
+        self.sketches = {}
+
+    def new_sketch(self):
+        return SpaceSavingSketch() if self.exact else SpaceSavingSketch.for_error(self.epsilon)
+
+    def consume(self, chunk):
+        """
+        Procesa un chunk con una columna por dimensión y por elemento
+        (cluster, state, month, product_id, product_category_name).
+        """
+        for item in self.ITEMS:
+            if item not in chunk.columns:
+                continue
+            for dim in self.DIMENSIONS:
+                if dim not in chunk.columns:
+                    continue
+                grouped = chunk.groupby([dim, item]).size()
+                for group, counts in grouped.groupby(level=0):
+                    key = (item, dim, group)
+                    if key not in self.sketches:
+                        self.sketches[key] = self.new_sketch()
+                    self.sketches[key].update(counts.droplevel(0))
+        return self
+
+    def stream_order_items(self, df_items, order_context, product_categories=None, chunksize=50_000):
+        """
+        Recorre order_items en chunks. `order_context` está indexado por
+        order_id con las columnas de dimensión; `product_categories` mapea
+        product_id -> categoría.
+        """
+        for start in range(0, len(df_items), chunksize):
+            items = df_items.iloc[start:start + chunksize]
+            chunk = order_context.reindex(items["order_id"].to_numpy()).reset_index(drop=True)
+            chunk["product_id"] = items["product_id"].to_numpy()
+            if product_categories is not None:
+                chunk["product_category_name"] = chunk["product_id"].map(product_categories)
+            self.consume(chunk)
+        return self
+
+    def merge(self, other):
+        for key, sketch in other.sketches.items():
+            if key in self.sketches:
+                self.sketches[key].merge(sketch)
+            else:
+                self.sketches[key] = SpaceSavingSketch.from_dict(sketch.to_dict())
+        return self
+
+    def top(self, item, dim, group):
+        sketch = self.sketches.get((item, dim, group))
+        return sketch.top(self.top_n) if sketch else []
+
+    def summary(self):
+        """Top-N por elemento, dimensión y grupo, con claves str para MongoDB."""
+        result = {item: {dim: {} for dim in self.DIMENSIONS} for item in self.ITEMS}
+        for (item, dim, group), sketch in sorted(self.sketches.items(), key=lambda kv: str(kv[0])):
+            result[item][dim][str(group)] = [
+                {"item": key, "count": count, "error": error}
+                for key, count, error in sketch.top(self.top_n)
+            ]
+        return result
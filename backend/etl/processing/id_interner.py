@@ -0,0 +1,92 @@
+# etl/processing/id_interner.py
+import numpy as np
+import pandas as pd
+
+
+class IdInterner:
+    """
+    Convierte los identificadores hexadecimales de 32 caracteres (order_id,
+    customer_id, product_id, seller_id) en códigos int32 compactos.
+
+    Cada espacio de claves se factoriza una sola vez sobre todos los datasets
+    que lo contienen, de modo que el mismo código representa al mismo id en
+    orders, order_items, customers, products y sellers. Los merges y groupbys
+    operan entonces sobre enteros; los strings originales solo se recuperan al
+    exportar a MongoDB.
+    """
+
+    KEY_COLUMNS = ("order_id", "customer_id", "product_id", "seller_id")
+    MISSING_CODE = -1
+
+    def __init__(self, key_columns=None):
+        self.key_columns = tuple(key_columns) if key_columns else self.KEY_COLUMNS
+        self.vocabularies = {}
+        self.memory_report = {}
+
+    def encode_datasets(self, datasets):
+        """
+        Reemplaza in-place las columnas de ids de cada DataFrame por sus
+        códigos int32 y registra la memoria ahorrada por columna.
+        """
+        print("Internando identificadores como códigos int32...")
+
+        for key in self.key_columns:
+            frames = {
+                name: df for name, df in datasets.items()
+                if isinstance(df, pd.DataFrame) and key in df.columns
+            }
+            if not frames:
+                continue
+
+            # Diccionario compartido: unión ordenada de los ids de todos los datasets
+            values = pd.concat([df[key].dropna() for df in frames.values()], ignore_index=True)
+            vocabulary = pd.Index(values.unique()).sort_values()
+            self.vocabularies[key] = vocabulary
+
+            for name, df in frames.items():
+                before = int(df[key].memory_usage(deep=True, index=False))
+                df[key] = self._encode(df[key], vocabulary)
+                after = int(df[key].memory_usage(deep=True, index=False))
+                self.memory_report[f"{name}.{key}"] = {"bytes_before": before, "bytes_after": after}
+
+        saved = self.bytes_saved()
+        print(f"Identificadores internados: {len(self.vocabularies)} espacios de claves, "
+              f"{saved / 1024 ** 2:.1f} MB ahorrados")
+        return datasets
+
+    def decode_frame(self, df):
+        """Devuelve una copia de df con los códigos traducidos a los ids originales."""
+        decoded = df.copy()
+        for key, vocabulary in self.vocabularies.items():
+            if key in decoded.columns:
+                decoded[key] = self.decode(key, decoded[key])
+        return decoded
+
+    def decode(self, key, codes):
+        """Traduce un array/Series/lista de códigos del espacio `key` a strings."""
+        vocabulary = self.vocabularies.get(key)
+        if vocabulary is None:
+            return codes
+
+        index = codes.index if isinstance(codes, pd.Series) else None
+        codes = np.asarray(codes, dtype=np.int64)
+        values = np.asarray(vocabulary, dtype=object)
+        decoded = np.where(codes >= 0, values[np.clip(codes, 0, None)], None)
+
+        if index is not None:
+            return pd.Series(decoded, index=index, dtype=object)
+        return decoded.tolist()
+
+    def encode(self, key, ids):
+        """Traduce ids externos al código interno del espacio `key` (-1 si no existe)."""
+        vocabulary = self.vocabularies.get(key)
+        if vocabulary is None:
+            return ids
+        return self._encode(pd.Series(ids), vocabulary).to_numpy()
+
+    def bytes_saved(self):
+        return sum(r["bytes_before"] - r["bytes_after"] for r in self.memory_report.values())
+
+    def _encode(self, column, vocabulary):
+        codes = vocabulary.get_indexer(column)
+        return pd.Series(codes.astype(np.int32), index=column.index)
@@ -0,0 +1,153 @@
+# etl/processing/stage_graph.py
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class Stage:
+    """
+    Etapa del pipeline: una función con entradas y salidas declaradas.
+
+    `func` recibe un dict con las entradas disponibles. Si la etapa declara una
+    sola salida devuelve el valor directamente; si declara varias devuelve un
+    dict {salida: valor}.
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=None, optional_inputs=()):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.optional_inputs = tuple(optional_inputs)
+        self.outputs = tuple(outputs) if outputs else (name,)
+
+
+class StageGraph:
+    """
+    Ejecuta etapas en un pool de threads respetando sus dependencias.
+
+    Las etapas independientes corren en paralelo (hasta `max_workers`). Un
+    fallo queda aislado en su etapa: las etapas que requieren sus salidas se
+    omiten, el resto del grafo continúa.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max(1, int(max_workers or 1))
+        self.stages = {}
+        self.status = {}
+        self.errors = {}
+        self.timings = {}
+
+    def add_stage(self, name, func, inputs=(), outputs=None, optional_inputs=()):
+        if name in self.stages:
+            raise ValueError(f"Etapa duplicada: {name}")
+        self.stages[name] = Stage(name, func, inputs, outputs, optional_inputs)
+        return self
+
+    def run(self, context=None, only=None, on_complete=None):
+        """
+        Ejecuta el grafo y devuelve el dict de salidas disponibles.
+
+        `context` aporta salidas ya calculadas (p.ej. checkpoints); `only`
+        restringe qué etapas se ejecutan, el resto debe venir en `context`.
+        `on_complete(nombre, salidas)` se invoca en el thread principal al
+        terminar cada etapa con éxito.
+        """
+        outputs = dict(context or {})
+        selected = [s for s in self.stages.values() if only is None or s.name in only]
+        producers = self._producers(selected)
+        deps = {
+            s.name: {producers[i] for i in s.inputs + s.optional_inputs if i in producers}
+            for s in selected
+        }
+        self._check_acyclic(deps)
+
+        pending = {s.name: s for s in selected}
+        running = {}
+        done = set()
+        self.status, self.errors, self.timings = {}, {}, {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for name in [n for n in pending if deps[n] <= done]:
+                    if len(running) >= self.max_workers:
+                        break
+                    stage = pending.pop(name)
+                    missing = [i for i in stage.inputs if i not in outputs]
+                    if missing:
+                        print(f"Etapa '{name}' omitida: faltan entradas {missing}")
+                        self.status[name] = "skipped"
+                        done.add(name)
+                        continue
+                    available = {
+                        i: outputs[i] for i in stage.inputs + stage.optional_inputs if i in outputs
+                    }
+                    running[pool.submit(self._run_stage, stage, available)] = stage
+
+                if not running:
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage = running.pop(future)
+                    try:
+                        result = future.result()
+                        outputs.update(result)
+                        self.status[stage.name] = "ok"
+                        if on_complete:
+                            on_complete(stage.name, result)
+                    except Exception as e:
+                        print(f"Error en etapa '{stage.name}': {e}")
+                        self.status[stage.name] = "failed"
+                        self.errors[stage.name] = str(e)
+                    done.add(stage.name)
+
+        return outputs
+
+    def dependents(self, name):
+        """Nombres de las etapas que dependen, directa o transitivamente, de `name`."""
+        producers = self._producers(self.stages.values())
+        result, frontier = set(), [name]
+        while frontier:
+            current = frontier.pop()
+            for stage in self.stages.values():
+                deps = {producers.get(i) for i in stage.inputs + stage.optional_inputs}
+                if current in deps and stage.name not in result:
+                    result.add(stage.name)
+                    frontier.append(stage.name)
+        return result
+
+    def _run_stage(self, stage, available):
+        start = time.perf_counter()
+        try:
+            result = stage.func(available)
+        finally:
+            self.timings[stage.name] = round(time.perf_counter() - start, 3)
+
+        if len(stage.outputs) == 1:
+            return {stage.outputs[0]: result}
+        return {name: result[name] for name in stage.outputs}
+
+    def _producers(self, stages):
+        producers = {}
+        for stage in stages:
+            for out in stage.outputs:
+                if out in producers:
+                    raise ValueError(f"Salida '{out}' producida por más de una etapa")
+                producers[out] = stage.name
+        return producers
+
+    def _check_acyclic(self, deps):
+        visited, in_stack = set(), set()
+
+        def visit(name):
+            if name in in_stack:
+                raise ValueError(f"Ciclo de dependencias en la etapa '{name}'")
+            if name in visited:
+                return
+            in_stack.add(name)
+            for dep in deps[name]:
+                visit(dep)
+            in_stack.discard(name)
+            visited.add(name)
+
+        for name in deps:
+            visit(name)
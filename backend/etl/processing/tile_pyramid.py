@@ -0,0 +1,122 @@
+# etl/processing/tile_pyramid.py
+import numpy as np
+import pandas as pd
+
+
+class TilePyramidBuilder:
+    """
+    Agrega clientes, pedidos y warehouses en tiles quadkey (Web Mercator)
+    para varios niveles de zoom.
+
+    El frontend pide solo los tiles del viewport por `_id` (el quadkey, único
+    entre niveles porque su largo es el zoom) en lugar de descargar las
+    coordenadas de cada cliente. Un prefijo de quadkey identifica además
+    todos los tiles contenidos en un tile de menor zoom.
+    """
+
+    ZOOM_LEVELS = (4, 6, 8, 10, 12)
+    MAX_LATITUDE = 85.05112878
+
+    def __init__(self, customer_locations, df_orders, warehouses=None, zoom_levels=None):
+        self.customer_locations = customer_locations
+        self.df_orders = df_orders
+        self.warehouses = warehouses or []
+        self.zoom_levels = tuple(zoom_levels) if zoom_levels else self.ZOOM_LEVELS
+
+    def build(self):
+        print(f"Construyendo pirámide de tiles (zoom {list(self.zoom_levels)})...")
+
+        customers = self._customer_frame()
+        warehouses = pd.DataFrame(
+            [(w["warehouse_id"], w["latitude"], w["longitude"]) for w in self.warehouses],
+            columns=["warehouse_id", "lat", "lng"]
+        )
+
+        tiles = []
+        for zoom in self.zoom_levels:
+            tiles.extend(self._build_level(customers, warehouses, zoom))
+
+        print(f"Pirámide de tiles: {len(tiles)} tiles")
+        return tiles
+
+    def _customer_frame(self):
+        # Un registro por cliente con sus pedidos y la suma de días de entrega
+        orders = self.df_orders[["customer_id", "order_purchase_timestamp", "order_delivered_customer_date"]].copy()
+        purchase = pd.to_datetime(orders["order_purchase_timestamp"], errors="coerce")
+        delivered = pd.to_datetime(orders["order_delivered_customer_date"], errors="coerce")
+        orders["delivery_days"] = (delivered - purchase).dt.days
+
+        per_customer = orders.groupby("customer_id").agg(
+            orders=("delivery_days", "size"),
+            days_sum=("delivery_days", "sum"),
+            days_count=("delivery_days", "count")
+        )
+
+        customers = self.customer_locations[["customer_id", "geolocation_lat", "geolocation_lng"]].rename(
+            columns={"geolocation_lat": "lat", "geolocation_lng": "lng"}
+        )
+        customers = customers.join(per_customer, on="customer_id")
+        return customers.fillna({"orders": 0, "days_sum": 0, "days_count": 0})
+
+    def _build_level(self, customers, warehouses, zoom):
+        cust = customers.assign(**self._tile_xy(customers["lat"], customers["lng"], zoom))
+        level = (
+            cust.groupby(["x", "y"])
+            .agg(
+                customers=("customer_id", "size"),
+                orders=("orders", "sum"),
+                days_sum=("days_sum", "sum"),
+                days_count=("days_count", "sum")
+            )
+        )
+
+        if not warehouses.empty:
+            wh = warehouses.assign(**self._tile_xy(warehouses["lat"], warehouses["lng"], zoom))
+            wh_tiles = wh.groupby(["x", "y"])["warehouse_id"].agg(list).rename("warehouse_ids")
+            level = level.join(wh_tiles, how="outer")
+        else:
+            level["warehouse_ids"] = np.nan
+
+        level = level.reset_index()
+        level[["customers", "orders", "days_sum", "days_count"]] = (
+            level[["customers", "orders", "days_sum", "days_count"]].fillna(0)
+        )
+        level["warehouse_ids"] = [ids if isinstance(ids, list) else [] for ids in level["warehouse_ids"]]
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg_days = (level["days_sum"] / level["days_count"].replace(0, np.nan)).round(2)
+
+        result = pd.DataFrame({
+            "_id": self._quadkey(level["x"], level["y"], zoom),
+            "z": zoom,
+            "x": level["x"].astype(int),
+            "y": level["y"].astype(int),
+            "customers": level["customers"].astype(int),
+            "orders": level["orders"].astype(int),
+            "avg_delivery_days": avg_days.astype(object).where(avg_days.notna(), None),
+            "warehouse_count": level["warehouse_ids"].map(len),
+            "warehouse_ids": level["warehouse_ids"]
+        })
+        return result.to_dict(orient="records")
+
+    def _tile_xy(self, lat, lng, zoom):
+        n = 2 ** zoom
+        lat_rad = np.radians(np.clip(lat.to_numpy(dtype=float), -self.MAX_LATITUDE, self.MAX_LATITUDE))
+        x = np.floor((lng.to_numpy(dtype=float) + 180.0) / 360.0 * n)
+        y = np.floor((1.0 - np.log(np.tan(lat_rad) + 1.0 / np.cos(lat_rad)) / np.pi) / 2.0 * n)
+        return {
+            "x": np.clip(x, 0, n - 1).astype(np.int64),
+            "y": np.clip(y, 0, n - 1).astype(np.int64)
+        }
+
+    @staticmethod
+    def _quadkey(x, y, zoom):
+        # Un dígito por nivel: bit de x + 2 * bit de y, del nivel 1 al `zoom`
+        x = x.to_numpy(dtype=np.int64)
+        y = y.to_numpy(dtype=np.int64)
+        quadkey = pd.Series("", index=range(len(x)))
+        for level in range(zoom, 0, -1):
+            mask = 1 << (level - 1)
+            digit = ((x & mask) > 0).astype(int) + 2 * ((y & mask) > 0).astype(int)
+            quadkey = quadkey + pd.Series(digit).astype(str)
+        return quadkey.to_numpy()
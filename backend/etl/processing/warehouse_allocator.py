@@ -1,8 +1,8 @@
 #warehouse_allocator.py
-import pandas as pd
 import numpy as np
 from sklearn.cluster import KMeans
 from scipy.spatial.distance import cdist
+from .execution_backend import PandasBackend
 
 class WarehouseAllocator:
     """
@@ -10,41 +10,42 @@ class WarehouseAllocator:
     basado en la densidad de pedidos y coordenadas de clientes.
     """
 
-    def __init__(self, df_orders, df_customers, df_geolocation, df_items, df_products, n_clusters=None):
+    def __init__(self, df_orders, df_customers, df_geolocation, df_items, n_clusters=None, geo_index=None,
+                 backend=None):
         self.df_orders = df_orders
         self.df_customers = df_customers
         self.df_geolocation = df_geolocation
         self.df_items = df_items
-        self.df_products = df_products
         self.n_clusters = n_clusters
+        self.geo_index = geo_index
+        self.backend = backend if backend else PandasBackend()
         self.logs = []
+        self.customer_clusters = None
 
     def estimate(self):
         print("Estimando ubicaciones óptimas de warehouse mediante clustering geográfico...")
 
         # Preparar data
         df_cust = self.df_customers.copy()
-        df_geo = self.df_geolocation.copy()
 
         if "customer_zip_code_prefix" not in df_cust.columns:
             zip_col = [c for c in df_cust.columns if "zip" in c][0]
             df_cust = df_cust.rename(columns={zip_col: "customer_zip_code_prefix"})
 
-        if "geolocation_zip_code_prefix" not in df_geo.columns:
-            zip_col = [c for c in df_geo.columns if "zip" in c][0]
-            df_geo = df_geo.rename(columns={zip_col: "geolocation_zip_code_prefix"})
+        if self.geo_index is not None:
+            # Una coordenada media por prefijo, leída del índice mmap sin merge
+            lat, lng, _ = self.geo_index.lookup(df_cust["customer_zip_code_prefix"])
+            df_merge = df_cust[["customer_id"]].assign(geolocation_lat=lat, geolocation_lng=lng)
+            df_merge = df_merge.dropna(subset=["geolocation_lat", "geolocation_lng"])
+        else:
+            df_geo = self.df_geolocation
 
-        df_merge = pd.merge(
-            df_cust,
-            df_geo,
-            left_on="customer_zip_code_prefix",
-            right_on="geolocation_zip_code_prefix",
-            how="left"
-        )
+            if "geolocation_zip_code_prefix" not in df_geo.columns:
+                zip_col = [c for c in df_geo.columns if "zip" in c][0]
+                df_geo = df_geo.rename(columns={zip_col: "geolocation_zip_code_prefix"})
 
-        df_merge["geolocation_lat"] = pd.to_numeric(df_merge["geolocation_lat"], errors="coerce")
-        df_merge["geolocation_lng"] = pd.to_numeric(df_merge["geolocation_lng"], errors="coerce")
-        df_merge = df_merge.dropna(subset=["geolocation_lat", "geolocation_lng"])
+            # Solo customer_id y coordenadas: el backend proyecta antes del join
+            df_merge = self.backend.customer_coordinates(df_cust, df_geo)
 
         if df_merge.empty:
             raise ValueError("No hay coordenadas válidas para clientes tras el merge geográfico.")
@@ -65,18 +66,23 @@ class WarehouseAllocator:
         kmeans = KMeans(n_clusters=self.n_clusters, random_state=42, n_init=10)
         df_merge["cluster"] = kmeans.fit_predict(coords)
 
-        # Vincular pedidos y productos
-        df_full = (
-            self.df_orders.merge(self.df_items, on="order_id", how="inner")
-            .merge(self.df_products, on="product_id", how="left")
-            .merge(df_merge[["customer_id", "cluster"]], on="customer_id", how="left")
+        # Asignación cliente -> cluster y coordenadas (primer punto geográfico de cada cliente)
+        self.customer_clusters = (
+            df_merge[["customer_id", "cluster", "geolocation_lat", "geolocation_lng"]]
+            .drop_duplicates("customer_id")
+            .reset_index(drop=True)
+        )
+
+        # Solo clusters con ventas (un cluster por cliente). Los top_items los
+        # agrega DataProcessor desde HeavyHitterTracker
+        valid_clusters = self.backend.clusters_with_sales(
+            self.df_orders, self.df_items, self.customer_clusters
         )
 
-        if "cluster" not in df_full.columns or df_full["cluster"].isna().all():
+        if not valid_clusters:
             raise ValueError("No se pudo asignar ningún cluster a los clientes.")
 
         warehouses = []
-        valid_clusters = sorted(df_full["cluster"].dropna().unique())
         total_clusters = len(valid_clusters)
         total_customers = df_merge["customer_id"].nunique()
 
@@ -100,9 +106,6 @@ class WarehouseAllocator:
             density = cluster_points_filtered["customer_id"].nunique()
             relative_density = density / total_customers
 
-            cluster_items = df_full[df_full["cluster"] == cluster_id]
-            top_items = cluster_items["product_id"].value_counts().head(5).index.tolist()
-
             note = None
 
             # Subdivisión adaptativa
@@ -143,7 +146,7 @@ class WarehouseAllocator:
                         "density_ratio": round(sub_ratio, 4),
                         "warehouse_size": size,
                         "estimated_delivery_improvement_%": improvement,
-                        "top_items": top_items,
+                        "cluster_id": cluster_id,
                         "note": "Subdividido por alta densidad de clientes en área metropolitana"
                     })
 
@@ -179,7 +182,7 @@ class WarehouseAllocator:
                 "density_ratio": round(relative_density, 4),
                 "warehouse_size": size,
                 "estimated_delivery_improvement_%": improvement,
-                "top_items": top_items,
+                "cluster_id": cluster_id,
                 "note": note or "Cluster normal sin subdivisión"
             })
 
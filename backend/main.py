@@ -1,48 +1,205 @@
 # main.py
+import argparse
 import os
 from dotenv import load_dotenv
-from etl.processing.data_cleaner import DataCleaner
+from etl.processing.checkpoint_store import CheckpointStore
 from etl.processing.data_processor import DataProcessor
 from etl.database.mongo_handler import MongoDBHandler
 
-def main():
+CLEAN_STAGE = "clean"
+UPLOAD_STAGE = "upload"
+
+
+def pipeline_stages(processor):
+    """Orden completo de etapas: limpieza, etapas de análisis y carga a MongoDB."""
+    return [CLEAN_STAGE] + list(processor.build_stage_graph().stages) + [UPLOAD_STAGE]
+
+
+def parse_args(argv=None, stage_names=()):
+    parser = argparse.ArgumentParser(description="ETL Ecommerce Brazil")
+    parser.add_argument(
+        "--stages",
+        help=f"Etapas a ejecutar separadas por coma ({', '.join(stage_names)})"
+    )
+    parser.add_argument("--from-stage", choices=stage_names, help="Ejecutar desde esta etapa en adelante")
+    parser.add_argument("--resume", action="store_true", help="Omitir etapas con checkpoint vigente")
+    parser.add_argument("--run-dir", default="runs/latest", help="Directorio de checkpoints de la corrida")
+    parser.add_argument("--n-clusters", type=int, default=None)
+    parser.add_argument("--max-workers", type=int, default=4)
+    parser.add_argument(
+        "--geo-index", action="store_true",
+        help="Usar el índice mmap de prefijos postales (una coordenada media por cliente)"
+    )
+    parser.add_argument(
+        "--backend", choices=["pandas", "duckdb", "polars"], default="pandas",
+        help="Motor para los joins de la estimación de warehouses (duckdb/polars usan varios "
+             "núcleos; con uno solo rinden como pandas)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.stages and args.from_stage:
+        parser.error("--stages y --from-stage son excluyentes")
+    if args.stages:
+        args.stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+        unknown = [s for s in args.stages if s not in stage_names]
+        if unknown:
+            parser.error(f"Etapas desconocidas: {unknown}")
+    return args
+
+
+def requested_stages(args, all_stages):
+    if args.stages:
+        return [s for s in all_stages if s in args.stages]
+    if args.from_stage:
+        return all_stages[all_stages.index(args.from_stage):]
+    return list(all_stages)
+
+
+def select_stages(args, requested, store, dependents):
+    """Etapas de limpieza y análisis a ejecutar; la carga se decide tras el análisis."""
+    selected = [s for s in requested if s != UPLOAD_STAGE]
+    if args.resume:
+        # Recalcular una etapa invalida los checkpoints de sus dependientes
+        stale = {s for s in selected if not store.has(s)}
+        for stage in list(stale):
+            stale |= set(selected) if stage == CLEAN_STAGE else dependents(stage)
+        skipped = [s for s in selected if s not in stale]
+        if skipped:
+            print(f"Reanudando: se omiten etapas con checkpoint {skipped}")
+        selected = [s for s in selected if s not in skipped]
+    return selected
+
+
+def invalidate_changed_params(store, stage_params, dependents):
+    """Descarta checkpoints calculados con otros parámetros y los de sus dependientes."""
+    for stage, params in stage_params.items():
+        if store.has(stage) and store.params(stage) != params:
+            stale = [stage] + sorted(dependents(stage)) + [UPLOAD_STAGE]
+            print(f"Parámetros de '{stage}' cambiaron ({store.params(stage)} -> {params}); "
+                  f"se descartan checkpoints {stale}")
+            store.invalidate(stale)
+
+
+def upload_blockers(processor, store, selected, analysis_stages):
+    """Motivos por los que no se deben subir resultados a MongoDB."""
+    blockers = [
+        f"{stage}: {processor.stage_status.get(stage, 'sin ejecutar')}"
+        for stage in analysis_stages
+        if stage in selected and processor.stage_status.get(stage) != "ok"
+    ]
+    blockers += [
+        f"{stage}: sin checkpoint"
+        for stage in analysis_stages
+        if stage not in selected and not store.has(stage)
+    ]
+    return blockers
+
+
+def main(argv=None):
     print("INICIANDO SISTEMA ETL - ECOMMERCE BRAZIL")
     print("==================================================\n")
+    load_dotenv()
+
+    processor = DataProcessor()
+    all_stages = pipeline_stages(processor)
+    args = parse_args(argv, all_stages)
+    processor.max_workers = args.max_workers
+    processor.use_geo_index = args.geo_index
+    processor.backend = args.backend
+
+    store = CheckpointStore(args.run_dir)
+    analysis_stages = all_stages[1:-1]
+    dependents = processor.build_stage_graph().dependents
+
+    # Parámetros que determinan cada salida: si cambian, el checkpoint no sirve
+    stage_params = {
+        "warehouses": {"n_clusters": args.n_clusters, "backend": args.backend, "geo_index": args.geo_index}
+    }
+    invalidate_changed_params(store, stage_params, dependents)
+
+    requested = requested_stages(args, all_stages)
+    selected = select_stages(args, requested, store, dependents)
+
+    print(f"Etapas a ejecutar: {selected or 'ninguna'} (checkpoints en {args.run_dir})\n")
 
     # FASE 1: PROCESAMIENTO ETL
     print("FASE 1: PROCESAMIENTO ETL")
-    load_dotenv()
 
-    processor = DataProcessor()
+    if CLEAN_STAGE in selected:
+        if not processor.prepare_datasets():
+            print("Error durante la fase ETL.")
+            return
+        store.save(CLEAN_STAGE, processor.get_dataset_state())
+        store.invalidate(analysis_stages + [UPLOAD_STAGE])
+    else:
+        try:
+            processor.restore_dataset_state(store.load(CLEAN_STAGE))
+        except FileNotFoundError as e:
+            print(f"Error: {e}. Ejecutar primero la etapa '{CLEAN_STAGE}'.")
+            return
+
+    # Las salidas de etapas no seleccionadas se leen de sus checkpoints
+    context = {}
+    for stage in analysis_stages:
+        if stage not in selected and store.has(stage):
+            context.update(store.load(stage))
+
+    def on_stage_complete(stage, outputs):
+        store.save(stage, outputs, params=stage_params.get(stage))
+        store.invalidate(sorted(dependents(stage)) + [UPLOAD_STAGE])
 
-    if not processor.execute_etl():
+    try:
+        processor.run_analysis(
+            n_clusters=args.n_clusters,
+            only=[s for s in analysis_stages if s in selected],
+            context=context,
+            on_stage_complete=on_stage_complete
+        )
+    except Exception as e:
+        print(f"Error en el cálculo de métricas o ubicación: {e}")
         print("Error durante la fase ETL.")
         return
-    print("ETL completado exitosamente\n")
 
     # FASE 2: CARGA EN MONGODB
-    print("FASE 2: CARGA EN MONGODB")
+    # Se decide ahora: las etapas recalculadas invalidan una carga anterior
+    upload = UPLOAD_STAGE in requested and not (args.resume and store.has(UPLOAD_STAGE))
+    if upload:
+        blockers = upload_blockers(processor, store, selected, analysis_stages)
+        if blockers:
+            print(f"Error: resultados incompletos, no se cargan en MongoDB: {blockers}")
+            print("Error durante la fase ETL.")
+            return
+    print("ETL completado exitosamente\n")
 
-    mongo_uri = os.getenv("MONGODB_URI")
-    mongo_db_name = os.getenv("MONGODB_DATABASE", "ecommerce_brazil")
+    if upload:
+        print("FASE 2: CARGA EN MONGODB")
 
-    mongo_handler = MongoDBHandler(mongo_uri, mongo_db_name)
+        mongo_uri = os.getenv("MONGODB_URI")
+        mongo_db_name = os.getenv("MONGODB_DATABASE", "ecommerce_brazil")
 
-    if not mongo_handler.connect():
-        print("Error al conectar con MongoDB.")
-        return
+        mongo_handler = MongoDBHandler(mongo_uri, mongo_db_name)
 
-    print("Subiendo colecciones a MongoDB...")
+        if not mongo_handler.connect():
+            print("Error al conectar con MongoDB.")
+            return
 
-    try:
-        mongo_docs = processor.prepare_mongodb_documents()
-        for name, records in mongo_docs.items():
-            mongo_handler.insert_many(name, records)
-        print("Datos cargados exitosamente en MongoDB\n")
+        print("Subiendo colecciones a MongoDB...")
+        store.invalidate([UPLOAD_STAGE])
 
-    except Exception as e:
-        print(f"Error al cargar datos en MongoDB: {e}")
-        return
+        try:
+            mongo_docs = processor.prepare_mongodb_documents()
+            failed = [name for name, records in mongo_docs.items()
+                      if not mongo_handler.insert_many(name, records)]
+            if failed:
+                # Sin checkpoint: --resume vuelve a intentar la carga
+                print(f"Error al cargar colecciones en MongoDB: {failed}")
+                return
+            store.save(UPLOAD_STAGE, {name: len(records) for name, records in mongo_docs.items()})
+            print("Datos cargados exitosamente en MongoDB\n")
+
+        except Exception as e:
+            print(f"Error al cargar datos en MongoDB: {e}")
+            return
 
     # FASE 3: ANÁLISIS Y RESULTADOS
     print("FASE 3: ANÁLISIS Y RESULTADOS")
@@ -0,0 +1,55 @@
+# tests/test_geo_index.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from etl.processing.geo_index import ZipGeoIndex
+
+
+def write_geolocation(path, n_rows=200_000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "geolocation_zip_code_prefix": rng.integers(1000, 99999, n_rows),
+        "geolocation_lat": rng.uniform(-30, -3, n_rows),
+        "geolocation_lng": rng.uniform(-60, -35, n_rows)
+    })
+    df.to_csv(path, index=False)
+    return df
+
+
+def open_index(source_path, index_dir):
+    index = ZipGeoIndex.open_or_build(source_path, index_dir)
+    lat, lng, count = index.lookup([1000, 54321, 99998])
+    return index.version, lat.tolist(), lng.tolist(), count.tolist()
+
+
+def test_lookup_matches_groupby_mean(tmp_path):
+    df = write_geolocation(tmp_path / "geo.csv", n_rows=20_000)
+    index = ZipGeoIndex.open_or_build(tmp_path / "geo.csv", tmp_path / "index")
+
+    expected = df.groupby("geolocation_zip_code_prefix")[["geolocation_lat", "geolocation_lng"]].mean()
+    lat, lng, count = index.lookup(expected.index)
+    np.testing.assert_allclose(lat, expected["geolocation_lat"])
+    np.testing.assert_allclose(lng, expected["geolocation_lng"])
+    assert count.sum() == len(df)
+
+    lat, _, count = index.lookup(["abc", -1, 100_000])
+    assert np.isnan(lat).all() and (count == 0).all()
+
+
+def test_concurrent_builders_publish_one_consistent_version(tmp_path):
+    source, index_dir = tmp_path / "geo.csv", tmp_path / "index"
+    write_geolocation(source)
+
+    for _ in range(2):
+        with ProcessPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(open_index, [source] * 8, [index_dir] * 8))
+
+        # Todos los workers abren la misma versión, construida una sola vez
+        assert len(set(map(str, results))) == 1
+        assert sorted(p.name for p in index_dir.iterdir()) == ["meta.json", results[0][0]]
+
+        # Cambiar el CSV fuerza una reconstrucción en la segunda vuelta
+        os.utime(source, ns=(0, os.stat(source).st_mtime_ns + 10**9))
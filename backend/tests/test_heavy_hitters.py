@@ -0,0 +1,73 @@
+# tests/test_heavy_hitters.py
+import numpy as np
+import pandas as pd
+
+from etl.processing.heavy_hitters import HeavyHitterTracker, SpaceSavingSketch
+
+
+def zipf_stream(n, n_items=500, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.Series(np.minimum(rng.zipf(1.3, n), n_items) + rng.integers(0, 3, n) * 1000)
+
+
+def update_in_chunks(sketch, stream, chunksize=1000):
+    for start in range(0, len(stream), chunksize):
+        sketch.update(stream.iloc[start:start + chunksize].value_counts())
+    return sketch
+
+
+def assert_bounds(sketch, stream):
+    true_counts = stream.value_counts()
+    assert sketch.total == len(stream)
+    for item, count in sketch.counts.items():
+        error = sketch.errors[item]
+        assert count - error <= true_counts.get(item, 0) <= count
+        assert error <= sketch.error_bound()
+    # Un elemento no monitoreado no puede superar el menor contador
+    unmonitored = true_counts.drop(sketch.counts.index, errors="ignore")
+    assert (unmonitored <= sketch.min_count()).all()
+
+
+def test_exact_tracker_matches_value_counts():
+    # Conteos distintos por producto: el top-N no depende del desempate
+    rows = [
+        (cluster, f"p{product}")
+        for cluster in range(3)
+        for product in range(12)
+        for _ in range((product + 1) * (cluster + 2))
+    ]
+    df = pd.DataFrame(rows, columns=["cluster", "product_id"]).sample(frac=1, random_state=1)
+    df["order_id"] = np.arange(len(df))
+
+    tracker = HeavyHitterTracker(top_n=5, exact=True)
+    tracker.stream_order_items(df[["order_id", "product_id"]], df.set_index("order_id")[["cluster"]], chunksize=64)
+
+    for cluster, group in df.groupby("cluster"):
+        expected = group["product_id"].value_counts().head(5)
+        assert tracker.top("product_id", "cluster", cluster) == [
+            (item, int(count), 0) for item, count in expected.items()
+        ]
+
+
+def test_bounded_sketch_bounds():
+    stream = zipf_stream(50_000)
+    sketch = update_in_chunks(SpaceSavingSketch(capacity=50), stream)
+
+    assert len(sketch.counts) == 50
+    assert sketch.error_bound() == len(stream) / 50
+    assert_bounds(sketch, stream)
+
+
+def test_bounds_hold_after_merge_and_round_trip():
+    first, second = zipf_stream(30_000, seed=2), zipf_stream(20_000, seed=3)
+    sketch = update_in_chunks(SpaceSavingSketch(capacity=40), first)
+    sketch.merge(update_in_chunks(SpaceSavingSketch(capacity=40), second))
+    assert_bounds(sketch, pd.concat([first, second]))
+
+    restored = SpaceSavingSketch.from_dict(sketch.to_dict())
+    assert_bounds(restored, pd.concat([first, second]))
+    assert restored.top(10) == sketch.top(10)
+
+    third = zipf_stream(10_000, seed=4)
+    restored.merge(update_in_chunks(SpaceSavingSketch(capacity=40), third))
+    assert_bounds(restored, pd.concat([first, second, third]))
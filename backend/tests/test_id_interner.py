@@ -0,0 +1,26 @@
+# tests/test_id_interner.py
+import pandas as pd
+
+from etl.processing.data_processor import DataProcessor
+
+
+def test_get_processed_data_returns_original_ids():
+    orders = pd.DataFrame({
+        "order_id": ["e481f51cbdc54678b7cc49136f2d6af7", "53cdb2fc8bc7dce0b6741e2150273451"],
+        "customer_id": ["9ef432eb6251297304e76186b10a928d", "b0830fb4747a6c6d20dea0b8c802d7ef"]
+    })
+    items = pd.DataFrame({
+        "order_id": ["53cdb2fc8bc7dce0b6741e2150273451"],
+        "product_id": ["87285b34884572647811a353c7ac498a"]
+    })
+
+    processor = DataProcessor()
+    processor.cleaner.datasets = {"orders": orders.copy(), "order_items": items.copy()}
+    processor.interner.encode_datasets(processor.cleaner.datasets)
+    assert processor.cleaner.datasets["orders"]["order_id"].dtype == "int32"
+
+    originals = processor.get_processed_data()["datasets_originales"]
+    pd.testing.assert_frame_equal(originals["orders"], orders, check_dtype=False)
+    pd.testing.assert_frame_equal(originals["order_items"], items, check_dtype=False)
+    # Los datasets de trabajo siguen internados
+    assert processor.cleaner.datasets["order_items"]["product_id"].dtype == "int32"